@@ -6,34 +6,124 @@ rango completo de tiempos, desplazamiento en segundos, lectura de posición del
 funcionalidad centrado de evento sin línea auxiliar, preservando ms cuando desplazamiento = 0.
 """
 import os
+import queue
 import sys
-from datetime import datetime, timedelta, time as dt_time
+import threading
+from concurrent.futures import Future
+from functools import lru_cache
+from datetime import datetime, timedelta
 from dotenv import load_dotenv, find_dotenv
 import tkinter as tk
 from tkinter import filedialog, messagebox
-from obspy import read, UTCDateTime
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib
-matplotlib.use('TkAgg')
-import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+# Funciones auxiliares sin Tk en scripts/utils (importables desde las pruebas)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils"))
+from lectura_mseed import indice_registros, leer_ventana, limites_por_canal
+from cache_npy import leer_cache_npy, guardar_cache_npy
+from previsualizacion import (parse_hora, formatear_hora, envolvente, precompilar_minmax, resamplear_100hz,
+                              extraer_segmento, a_float32)
 
-# --- Leer variables de entorno ---
-load_dotenv(find_dotenv())
+# --- Leer variables de entorno (se omite la búsqueda de .env si ya está exportada) ---
+if not os.environ.get("PROJECT_LOCAL_ROOT"):
+    load_dotenv(find_dotenv())
 PROJECT_LOCAL_ROOT = os.getenv("PROJECT_LOCAL_ROOT")
 if not PROJECT_LOCAL_ROOT:
     print("ERROR: PROJECT_LOCAL_ROOT no definido en .env")
     sys.exit(1)
+DIR_MSEED = os.path.join(PROJECT_LOCAL_ROOT, "resultados", "mseed")
+# Caché .npy del canal completo: opcional porque decodifica todo el canal en segundo plano
+CACHE_NPY = os.getenv("GUI_CACHE_NPY") == "1"
+DIR_CACHE = os.path.join(PROJECT_LOCAL_ROOT, "resultados", "cache_npy")
+
+# Color fijo por canal (una sola colección de líneas para todas las trazas)
+COLORES_CANAL = {"ENT": "C0", "ENR": "C1", "ENV": "C2"}
+
+# Margen (s) leído a cada lado de la ventana para que el filtro de resampleo no deforme los bordes
+PAD_S = 1.0
 
 # --- Variables globales ---
-resampled_stream = None
-file_starttime = None
-fig, ax, canvas = None, None, None
+file_path = None
+file_basename = None
+file_limites = None  # {canal: (inicio, fin)} de todos los segmentos del canal
+file_info = None
+fig, ax = None, None
+coleccion, linea_centro, linea_cursor, leyenda, fondo, vista = None, None, None, None, None, None
+trazas_vista = []  # (tiempos, datos) float32 de la última ventana, sin reducir
 centrar_mode = False
+pos_pendiente, cursor_pendiente = None, None
+# Cola del hilo único (daemon) de lectura/decodificación/resampleo: el bucle de Tk sigue atendiendo eventos
+cola_io = queue.Queue()
+caches_en_curso = set()  # (archivo, canal) con caché .npy ya generada o en curso
+
+# obspy y scipy.signal dominan el arranque en frío: se importan en el primer uso desde el hilo de E/S
+read = UTCDateTime = None
 
 # --- Funciones comunes ---
+def importar_obspy():
+    global read, UTCDateTime
+    if read is None:
+        from obspy import read, UTCDateTime
+
+# Cabeceras del archivo y, de paso, el índice de registros por canal que usarán las previsualizaciones
+def leer_cabeceras(fn):
+    importar_obspy()
+    indice_registros(fn, os.path.getmtime(fn))
+    return read(fn, format='MSEED', headonly=True)
+
+# Con GUI_CACHE_NPY=1, una vez por (archivo, canal) tras abrir; hilo daemon: cerrar la GUI no espera la decodificación
+def iniciar_cache_npy(path, canal):
+    if CACHE_NPY and (path, canal) not in caches_en_curso:
+        caches_en_curso.add((path, canal))
+        threading.Thread(target=guardar_cache_npy, args=(DIR_CACHE, path, canal), daemon=True).start()
+
+# Trazas (tiempos, datos) del canal en [ns0, ns1] a 100 Hz; mtime en la clave invalida la caché. No modificar in situ
+@lru_cache(maxsize=4)
+def cargar_ventana(path, mtime, ns0, ns1, canal):
+    t0 = UTCDateTime(ns=ns0); t1 = UTCDateTime(ns=ns1)
+    # Con caché en disco vigente la ventana es un recorte directo del arreglo mapeado
+    tr = leer_cache_npy(DIR_CACHE, path, mtime, canal) if CACHE_NPY else None
+    if tr is not None:
+        return extraer_segmento([tr], t0, t1)
+    # Decodificar solo los registros del canal en la ventana (con margen): el filtro polifásico
+    # no procesa canales descartados
+    segment = leer_ventana(path, indice_registros(path, mtime), t0 - PAD_S, t1 + PAD_S, canal)
+    return extraer_segmento(resamplear_100hz(a_float32(segment)), t0, t1)
+
+# En el hilo de E/S: si el archivo desapareció, el OSError de getmtime llega a "Error lectura" por el futuro
+def cargar_ventana_archivo(path, ns0, ns1, canal):
+    return cargar_ventana(path, os.path.getmtime(path), ns0, ns1, canal)
+
+# Hilo de E/S daemon en lugar de ThreadPoolExecutor (cuyos hilos se esperan al salir): Salir no queda
+# bloqueado por un escaneo de cabeceras o un read() completo en curso
+def trabajador_io():
+    while True:
+        fut, fn, args = cola_io.get()
+        if fut.set_running_or_notify_cancel():
+            try:
+                fut.set_result(fn(*args))
+            except Exception as e:
+                fut.set_exception(e)
+
+def enviar_io(fn, *args):
+    fut = Future(); cola_io.put((fut, fn, args))
+    return fut
+
 def cerrar():
     ventana.quit(); ventana.destroy(); sys.exit(0)
 
+# Espera no bloqueante de una tarea del hilo de E/S; al terminar, listo(fut) corre en el hilo de Tk
+def esperar(fut, listo):
+    if not fut.done():
+        ventana.after(50, esperar, fut, listo); return
+    ocupado(False); listo(fut)
+
+def ocupado(estado):
+    for b in (btn_abrir, btn_previsualizar):
+        b.config(state=tk.DISABLED if estado else tk.NORMAL)
+
 def toggle_centrar():
     global centrar_mode
     centrar_mode = not centrar_mode
@@ -60,48 +150,117 @@ def on_mouse_move(event):
     if centrar_mode and event.inaxes and event.xdata is not None:
         dur = float(spin_duracion.get()); center = dur / 2.0
         delta = event.xdata - center
-        lbl_pos.config(text=f"Δ: {delta:+.2f} s")
+        mostrar_pos(f"Δ: {delta:+.2f} s", event.xdata)
     elif event.inaxes and event.xdata is not None:
-        lbl_pos.config(text=f"Posición: {event.xdata:.2f} s")
+        mostrar_pos(f"Posición: {event.xdata:.2f} s", event.xdata)
     else:
-        lbl_pos.config(text="Posición: --")
+        mostrar_pos("Posición: --")
 
-# Abrir archivo y resamplear a 100 Hz
+# Etiqueta de posición y cursor se actualizan a lo sumo cada 33 ms (~30 Hz) con el último estado
+def mostrar_pos(texto, x=None):
+    global pos_pendiente, cursor_pendiente
+    if pos_pendiente is None:
+        ventana.after(33, aplicar_pos)
+    pos_pendiente, cursor_pendiente = texto, x
+
+def aplicar_pos():
+    global pos_pendiente
+    if pos_pendiente != lbl_pos.cget('text'):
+        lbl_pos.config(text=pos_pendiente)
+    pos_pendiente = None
+    # Cursor vertical: solo se re-dibujan los artistas animados sobre el fondo guardado
+    x = cursor_pendiente
+    if x is None and not linea_cursor.get_visible():
+        return
+    linea_cursor.set_visible(x is not None)
+    if x is not None: linea_cursor.set_xdata([x, x])
+    if fondo is not None: blit_animados()
+
+# Abrir archivo leyendo solo cabeceras en el hilo de E/S (muestras y resampleo se difieren a la ventana)
 def abrir_archivo():
-    global resampled_stream, file_starttime
     fn = filedialog.askopenfilename(
         title="Selecciona un mseed",
-        initialdir=os.path.join(PROJECT_LOCAL_ROOT, "resultados", "mseed"),
+        initialdir=DIR_MSEED,
         filetypes=[("MiniSEED","*.mseed"),("Todos","*.*")]
     )
     if not fn:
         return
     entry_archivo.delete(0, tk.END); entry_archivo.insert(0, fn)
+    ocupado(True); esperar(enviar_io(leer_cabeceras, fn), lambda f: archivo_abierto(fn, f))
+
+def archivo_abierto(fn, fut):
+    global file_path, file_basename, file_limites, file_info
     try:
-        s = read(fn); s.resample(100.0); resampled_stream = s
-        st = s[0].stats.starttime; et = s[0].stats.endtime; file_starttime = st
-        date = st.date; start_str = st.datetime.strftime('%H:%M:%S'); end_str = et.datetime.strftime('%H:%M:%S')
-        lbl_fecha.config(text=f"Fecha: {date}   Inicio: {start_str}   Fin: {end_str}")
-        entry_hora.delete(0, tk.END); entry_hora.insert(0, start_str)
+        s = fut.result(); file_path = fn; file_basename = os.path.basename(fn)
+        # s[0] termina en el primer hueco de su canal: los límites cubren todos los segmentos y canales
+        file_limites = limites_por_canal(s)
+        st = min(ini for ini, _ in file_limites.values()); et = max(fin for _, fin in file_limites.values())
+        # Metadata calculada una sola vez por archivo (fecha y horas formateadas)
+        st_dt = st.datetime
+        file_info = {'date': st_dt.date(), 'start_time': st_dt.strftime('%H:%M:%S'),
+                     'end_time': et.datetime.strftime('%H:%M:%S')}
+        lbl_fecha.config(text=f"Fecha: {file_info['date']}   Inicio: {file_info['start_time']}   Fin: {file_info['end_time']}")
+        entry_hora.delete(0, tk.END); entry_hora.insert(0, file_info['start_time'])
         entry_shift.delete(0, tk.END); entry_shift.insert(0, "0")
     except Exception as e:
-        messagebox.showerror("Error apertura", str(e)); resampled_stream = None
+        messagebox.showerror("Error apertura", str(e)); file_path = None; file_info = None; return
+    iniciar_cache_npy(fn, channel_var.get())
+
+# Figura persistente: se crea una vez al iniciar y luego solo se actualizan los datos
+# Trazas (una LineCollection) y línea central son artistas animados que se redibujan con blit
+def crear_figura():
+    global fig, ax, coleccion, linea_centro, linea_cursor, leyenda
+    # API orientada a objetos: sin pyplot la figura no queda registrada en Gcf
+    fig = Figure(figsize=(6,3)); ax = fig.add_subplot(111)
+    ax.set_xlabel('Tiempo (s)'); ax.set_ylabel('Amplitud')
+    coleccion = LineCollection([], linewidths=0.8, animated=True); ax.add_collection(coleccion)
+    linea_centro = ax.axvline(0, color='r', animated=True)
+    linea_cursor = ax.axvline(0, color='0.4', linewidth=0.8, linestyle='--', animated=True, visible=False)
+    # Leyenda fija de una entrada: por previsualización solo cambian color y texto
+    leyenda = ax.legend(handles=[Line2D([], [], color='C0', label='ENT')], loc='upper right', fontsize='small')
+    leyenda.set_visible(False)
+    # El lienzo no se guarda aparte: se accede siempre como fig.canvas
+    canvas = FigureCanvasTkAgg(fig, master=frame_plot)
+    canvas.get_tk_widget().pack(fill='both', expand=True)
+    canvas.mpl_connect('motion_notify_event', on_mouse_move)
+    # Un movimiento rápido puede salir del lienzo sin un motion fuera de los ejes: ocultar cursor al salir
+    canvas.mpl_connect('axes_leave_event', lambda e: mostrar_pos("Posición: --"))
+    canvas.mpl_connect('figure_leave_event', lambda e: mostrar_pos("Posición: --"))
+    canvas.mpl_connect('button_press_event', on_click)
+    canvas.mpl_connect('draw_event', on_draw)
+    canvas.mpl_connect('resize_event', on_resize)
+
+def dibujar_animados():
+    ax.draw_artist(coleccion); ax.draw_artist(linea_centro); ax.draw_artist(linea_cursor)
+
+# Tras cada render completo (incluye redimensionar): guardar fondo estático
+def on_draw(event):
+    global fondo
+    fondo = fig.canvas.copy_from_bbox(fig.bbox)
+    dibujar_animados()
+
+# Se grafica a lo sumo la envolvente mín/máx por columna de píxel de los ejes;
+# al redimensionar cambia el ancho disponible y se vuelve a reducir la última ventana
+def actualizar_segmentos():
+    width_px = ax.bbox.width
+    segs = [envolvente(t, d, width_px) for t, d in trazas_vista]
+    coleccion.set_segments(segs)
+    return segs
+
+def on_resize(event):
+    if trazas_vista: actualizar_segmentos()
+
+def blit_animados():
+    fig.canvas.restore_region(fondo); dibujar_animados(); fig.canvas.blit(fig.bbox)
 
 # Previsualizar con desplazamiento vigente
 def previsualizar():
-    global fig, ax, canvas, centrar_mode
-    if resampled_stream is None:
+    if file_path is None:
         messagebox.showwarning("Aviso", "Primero abre un archivo mseed."); return
     # Obtener hora inicio con ms opcionales
-    raw = entry_hora.get()
     try:
-        if ',' in raw:
-            main, ms = raw.split(',')
-            t = datetime.strptime(main, '%H:%M:%S').time()
-            hora_dt = dt_time(t.hour, t.minute, t.second, int(ms) * 1000)
-        else:
-            hora_dt = datetime.strptime(raw, '%H:%M:%S').time()
-    except Exception:
+        hora_dt = parse_hora(entry_hora.get())
+    except ValueError:
         messagebox.showerror("Error", "Formato de hora inicio inválido."); return
     try:
         dur = float(spin_duracion.get()); shift_sec = float(entry_shift.get())
@@ -109,31 +268,48 @@ def previsualizar():
         messagebox.showerror("Error", "Duración o desplazamiento no válidos."); return
     shift_delta = timedelta(seconds=shift_sec)
     canal = channel_var.get()
-    base_dt = datetime.combine(file_starttime.date, hora_dt) + shift_delta
+    base_dt = datetime.combine(file_info['date'], hora_dt) + shift_delta
     t0 = UTCDateTime(base_dt); t1 = t0 + dur
-    segment = resampled_stream.slice(starttime=t0, endtime=t1).select(channel=canal)
-    if not segment:
+    lim = file_limites.get(canal)
+    if lim is None or t1 < lim[0] or t0 > lim[1]:
+        messagebox.showwarning("Sin datos", "No hay datos en el intervalo especificado."); return
+    iniciar_cache_npy(file_path, canal)  # canal elegido después de abrir
+    # Previsualizaciones repetidas de la misma ventana se sirven desde memoria
+    fut = enviar_io(cargar_ventana_archivo, file_path, t0.ns, t1.ns, canal)
+    ocupado(True); esperar(fut, lambda f: mostrar_ventana(f, base_dt, t0, dur, canal))
+
+# Graficar la ventana leída en segundo plano (hilo de Tk)
+def mostrar_ventana(fut, base_dt, t0, dur, canal):
+    global centrar_mode, vista, trazas_vista
+    try:
+        trazas = fut.result()
+    except Exception as e:
+        messagebox.showerror("Error lectura", str(e)); return
+    if not trazas:
         messagebox.showwarning("Sin datos", "No hay datos en el intervalo especificado."); return
     # Actualizar entrada hora con ms preservados
-    new_str = base_dt.strftime('%H:%M:%S') + f",{int(base_dt.microsecond/1000):02d}"
-    entry_hora.delete(0, tk.END); entry_hora.insert(0, new_str)
+    entry_hora.delete(0, tk.END); entry_hora.insert(0, formatear_hora(base_dt))
     entry_shift.delete(0, tk.END); entry_shift.insert(0, "0")
     # Desactivar modo centrar
     centrar_mode = False; btn_centrar.config(relief=tk.RAISED, text='Centrar: OFF'); lbl_pos.config(text='Posición: --')
-    # Limpiar gráfico previo
-    for w in frame_plot.winfo_children(): w.destroy()
-    fig, ax = plt.subplots(figsize=(6,3))
-    for tr in segment: ax.plot(tr.times(), tr.data, label=tr.stats.channel)
-    center = dur / 2.0; ax.axvline(center, color='r')
+    trazas_vista = trazas
+    segs = actualizar_segmentos()
+    color = COLORES_CANAL.get(canal, 'C0'); coleccion.set_color(color)
+    center = dur / 2.0; linea_centro.set_xdata([center, center])
     dtc = (t0 + center).datetime
-    lbl_centro.config(text=f"Centro: {dtc.strftime('%H:%M:%S')},{int(dtc.microsecond/1000):02d}")
-    ax.set_xlabel('Tiempo (s)'); ax.set_ylabel('Amplitud'); ax.set_title(os.path.basename(entry_archivo.get()))
-    ax.set_xlim(0, dur); ax.legend(loc='upper right', fontsize='small')
-    canvas = FigureCanvasTkAgg(fig, master=frame_plot)
-    canvas.get_tk_widget().pack(fill='both', expand=True)
-    canvas.mpl_connect('motion_notify_event', on_mouse_move)
-    canvas.mpl_connect('button_press_event', on_click)
-    canvas.draw()
+    lbl_centro.config(text=f"Centro: {formatear_hora(dtc)}")
+    ax.set_title(file_basename); ax.set_xlim(0, dur)
+    # relim no considera colecciones: límites Y calculados con el mismo margen del 5%
+    y0 = min(sg[:, 1].min() for sg in segs); y1 = max(sg[:, 1].max() for sg in segs)
+    margen = 0.05 * (y1 - y0) or 1.0; ax.set_ylim(y0 - margen, y1 + margen)
+    # Render completo (diferido) solo si cambian ejes, título o leyenda; si no, blit de las líneas
+    nueva_vista = (ax.get_xlim(), ax.get_ylim(), ax.get_title(), canal)
+    if nueva_vista != vista or fondo is None:
+        vista = nueva_vista
+        leyenda.get_lines()[0].set_color(color); leyenda.get_texts()[0].set_text(canal); leyenda.set_visible(True)
+        fig.canvas.draw_idle()
+    else:
+        blit_animados()
 
 # --- Configuración ventana ---
 ventana = tk.Tk(); ventana.title("Extracción de Eventos - GPD"); ventana.geometry("800x600"); ventana.protocol("WM_DELETE_WINDOW", cerrar)
@@ -142,6 +318,9 @@ frame_file = tk.Frame(ventana); frame_file.pack(fill='x', pady=5)
 tk.Label(frame_file, text="Archivo mseed:").pack(side='left', padx=5)
 entry_archivo = tk.Entry(frame_file, width=50); entry_archivo.pack(side='left', padx=5)
 btn_abrir = tk.Button(frame_file, text="Abrir…", command=abrir_archivo); btn_abrir.pack(side='left', padx=5)
+# El canal se elige junto al archivo: solo ese canal se decodifica al previsualizar
+tk.Label(frame_file, text="Canal:").pack(side='left', padx=5)
+channel_var = tk.StringVar(value="ENT"); tk.OptionMenu(frame_file, channel_var, "ENT", "ENR", "ENV").pack(side='left', padx=5)
 lbl_fecha = tk.Label(frame_file, text="Fecha: --   Inicio: --   Fin: --"); lbl_fecha.pack(side='left', padx=10)
 # Frame parámetros
 frame_param = tk.Frame(ventana); frame_param.pack(fill='x', pady=5)
@@ -151,8 +330,6 @@ tk.Label(frame_param, text="Duración (s):").grid(row=0, column=2, padx=5, stick
 spin_duracion = tk.Spinbox(frame_param, from_=0.1, to=600, increment=0.1, width=6); spin_duracion.grid(row=0, column=3, padx=5)
 tk.Label(frame_param, text="Desplazamiento (s):").grid(row=1, column=0, padx=5, sticky='e')
 entry_shift = tk.Entry(frame_param, width=6); entry_shift.insert(0, "0"); entry_shift.grid(row=1, column=1, padx=5, sticky='w')
-tk.Label(frame_param, text="Canal:").grid(row=1, column=2, padx=5, sticky='e')
-channel_var = tk.StringVar(value="ENT"); tk.OptionMenu(frame_param, channel_var, "ENT", "ENR", "ENV").grid(row=1, column=3, padx=5, sticky='w')
 # Frame acciones
 frame_actions = tk.Frame(ventana); frame_actions.pack(pady=10)
 btn_previsualizar = tk.Button(frame_actions, text="Previsualizar", command=previsualizar); btn_previsualizar.pack(side='left', padx=10)
@@ -162,4 +339,9 @@ lbl_centro = tk.Label(frame_actions, text="Centro: --"); lbl_centro.pack(side='l
 lbl_pos = tk.Label(frame_actions, text="Posición: --"); lbl_pos.pack(side='left', padx=10)
 # Frame plot
 frame_plot = tk.Frame(ventana); frame_plot.pack(fill='both', expand=True, pady=5)
+crear_figura()
+threading.Thread(target=trabajador_io, daemon=True).start()
+# La primera compilación JIT (o la carga desde la caché de numba) ocurre en segundo plano, fuera de la primera
+# previsualización y sin congelar la ventana; solo compila, el kernel se ejecuta únicamente desde el hilo de Tk
+if precompilar_minmax is not None: threading.Thread(target=precompilar_minmax, daemon=True).start()
 ventana.mainloop()
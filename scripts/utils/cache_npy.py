@@ -0,0 +1,62 @@
+"""
+Caché en disco del canal completo de un miniSEED resampleado a 100 Hz: arreglo float32
+en .npy más un .json con archivo de origen, mtime, canal, inicio y tasa. Se lee mapeada
+en memoria (mmap_mode='r'), de modo que recortar una ventana no copia muestras.
+"""
+import json
+import os
+
+import numpy as np
+
+from lectura_mseed import fuente_canal
+from previsualizacion import resamplear_100hz, a_float32
+
+# Rutas del .npy y del .json de un canal dentro del directorio de caché
+def rutas_cache(dir_cache, path, canal):
+    base = os.path.join(dir_cache, f"{os.path.basename(path)}.{canal}.100hz")
+    return base + ".npy", base + ".json"
+
+# Traza del canal a 100 Hz mapeada desde disco, o None si no hay caché vigente para ese archivo y mtime
+def leer_cache_npy(dir_cache, path, mtime, canal):
+    from obspy import Trace, UTCDateTime  # obspy se importa en el primer uso (ya cargado por quien llama)
+    npy, meta = rutas_cache(dir_cache, path, canal)
+    try:
+        with open(meta) as f:
+            info = json.load(f)
+        if info['path'] != path or info['mtime'] != mtime or info['channel'] != canal:
+            return None
+        data = np.load(npy, mmap_mode='r')
+    except (OSError, ValueError, KeyError):
+        return None
+    return Trace(data=data, header={'starttime': UTCDateTime(info['starttime']), 'channel': canal,
+                                    'sampling_rate': info['sampling_rate']})
+
+# Decodifica y resamplea el canal completo y lo persiste (reemplazando una caché vencida); solo si no tiene huecos
+def guardar_cache_npy(dir_cache, path, canal):
+    from obspy import read
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return
+    if leer_cache_npy(dir_cache, path, mtime, canal) is not None:
+        return
+    try:
+        st = read(path, format='MSEED', sourcename=fuente_canal(canal)).select(channel=canal)
+    except Exception:
+        return  # canal ausente o archivo ilegible: los errores se informan al previsualizar
+    if len(st) != 1:
+        return
+    tr = resamplear_100hz(a_float32(st))[0]
+    npy, meta = rutas_cache(dir_cache, path, canal)
+    try:
+        os.makedirs(dir_cache, exist_ok=True)
+        # Escritura atómica: un lector nunca ve un .npy o .json a medio escribir
+        with open(npy + '.tmp', 'wb') as f:
+            np.save(f, tr.data)
+        os.replace(npy + '.tmp', npy)
+        with open(meta + '.tmp', 'w') as f:
+            json.dump({'path': path, 'starttime': tr.stats.starttime.isoformat(), 'channel': canal,
+                       'sampling_rate': tr.stats.sampling_rate, 'mtime': mtime}, f)
+        os.replace(meta + '.tmp', meta)
+    except OSError:
+        pass  # directorio sin permiso de escritura: se sigue leyendo por ventanas
@@ -0,0 +1,102 @@
+"""
+Lectura de ventanas de archivos miniSEED sin decodificar el archivo completo: índice
+de registros por canal armado desde las cabeceras fijas y lectura de solo los registros
+del canal que cubren la ventana pedida.
+"""
+import io
+import mmap
+import struct
+from functools import lru_cache
+
+import numpy as np
+
+# Orden de bytes y longitud de registro según la blockette 1000 del primer registro
+def info_registros(mm):
+    # El año de la BTIME (bytes 20-21) solo es plausible con el orden de bytes correcto
+    for orden in ('>', '<'):
+        if 1900 <= struct.unpack_from(orden + 'H', mm, 20)[0] <= 2100:
+            break
+    else:
+        return None
+    off = struct.unpack_from(orden + 'H', mm, 46)[0]
+    while 48 <= off <= len(mm) - 8:
+        tipo, siguiente = struct.unpack_from(orden + 'HH', mm, off)
+        if tipo == 1000:
+            return orden, 2 ** mm[off + 6]
+        if siguiente <= off:
+            break
+        off = siguiente
+    return None
+
+# Campos de la cabecera fija SEED (48 bytes) usados por el índice, en sus desplazamientos dentro del registro
+def dtype_cabecera(orden):
+    return np.dtype({'names': ['calidad', 'canal', 'anio', 'dia', 'h', 'mi', 'seg', 'frac', 'nsamp', 'factor', 'mult'],
+                     'formats': ['S1', 'S3', orden + 'u2', orden + 'u2', 'u1', 'u1', 'u1',
+                                 orden + 'u2', orden + 'u2', orden + 'i2', orden + 'i2'],
+                     'offsets': [6, 15, 20, 22, 24, 25, 26, 28, 30, 32, 34], 'itemsize': 48})
+
+# Índice {canal: (registros, inicios, fines)} ordenado por tiempo, armado una vez por archivo desde las cabeceras
+@lru_cache(maxsize=2)
+def indice_registros(path, mtime):
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        cab = info_registros(mm) if len(mm) >= 64 else None
+        if cab is None or len(mm) % cab[1]:
+            return None
+        orden, reclen = cab
+        # Vista con paso reclen sobre el mapeo: se copian solo los campos, sin decodificar muestras
+        h = np.ndarray((len(mm) // reclen,), dtype=dtype_cabecera(orden), buffer=mm, strides=(reclen,))
+        valido = np.isin(h['calidad'], [b'D', b'R', b'Q', b'M']).all()
+        canales = h['canal'].copy()
+        dias = (h['anio'].astype(np.int64) - 1970).astype('datetime64[Y]').astype('datetime64[D]').astype(np.int64)
+        inicio = ((dias + h['dia'] - 1) * 86400.0 + h['h'] * 3600.0 + h['mi'] * 60.0 + h['seg'] + h['frac'] * 1e-4)
+        factor = h['factor'].astype(np.float64); mult = h['mult'].astype(np.float64)
+        nsamp = h['nsamp'].astype(np.float64)
+        del h  # el mapeo no puede cerrarse mientras exista una vista sobre él
+    if not valido:
+        return None
+    # Tasa SEED: factor > 0 multiplica y factor < 0 divide; igual para el multiplicador
+    with np.errstate(divide='ignore'):
+        sr = (np.where(factor > 0, factor, np.where(factor < 0, -1.0 / factor, 0.0))
+              * np.where(mult > 0, mult, np.where(mult < 0, -1.0 / mult, 0.0)))
+    fin = inicio + np.divide(nsamp, sr, out=np.zeros_like(nsamp), where=sr > 0)
+    indice = {}
+    for cod in np.unique(canales):
+        k = np.flatnonzero(canales == cod); k = k[np.argsort(inicio[k], kind='stable')]
+        # Fin acumulado (máximo corrido) para ubicar por bisección el primer registro que llega a t0
+        indice[cod.decode('ascii').strip()] = (k, inicio[k], np.maximum.accumulate(fin[k]))
+    return reclen, indice
+
+# {canal: (inicio, fin)} de una lectura de cabeceras: con huecos obspy entrega una traza por segmento
+def limites_por_canal(stream):
+    limites = {}
+    for tr in stream:
+        ini, fin = limites.get(tr.stats.channel, (tr.stats.starttime, tr.stats.endtime))
+        limites[tr.stats.channel] = (min(ini, tr.stats.starttime), max(fin, tr.stats.endtime))
+    return limites
+
+# Patrón NET.STA.LOC.CHA para que libmseed descarte en la lectura los registros de otros canales
+def fuente_canal(canal):
+    return f"*.*.*.{canal}"
+
+# Lee [t0, t1] decodificando solo los registros del canal que cubren la ventana; si no, read() con starttime/endtime
+def leer_ventana(path, indice, t0, t1, canal):
+    from obspy import read, Stream  # obspy se importa en el primer uso (ya cargado por quien llama)
+    reg = indice[1].get(canal) if indice is not None else None
+    if reg is not None:
+        reclen = indice[0]; k, ini, fin = reg
+        # Bisección sobre los registros del canal: los de otros canales no se tocan
+        j0 = np.searchsorted(fin, t0.timestamp, 'right'); j1 = np.searchsorted(ini, t1.timestamp, 'right')
+        if j1 <= j0:
+            return Stream()
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            datos = b''.join(mm[r * reclen:(r + 1) * reclen] for r in k[j0:j1].tolist())
+        st = read(io.BytesIO(datos), format='MSEED', starttime=t0, endtime=t1)
+        if st:
+            # Cobertura exigida solo dentro de los datos del canal: una ventana con margen que
+            # empieza antes del inicio o termina después del fin del archivo no fuerza read()
+            delta = st[0].stats.delta
+            a = max(t0.timestamp, ini[0]); b = min(t1.timestamp, fin[-1])
+            if (min(tr.stats.starttime.timestamp for tr in st) <= a + delta
+                    and max(tr.stats.endtime.timestamp for tr in st) >= b - 2 * delta):
+                return st
+    return read(path, starttime=t0, endtime=t1, format='MSEED', sourcename=fuente_canal(canal))
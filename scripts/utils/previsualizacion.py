@@ -0,0 +1,123 @@
+"""
+Funciones auxiliares de previsualización de trazas: lectura y formato de horas
+'HH:MM:SS,mmm', resampleo a 100 Hz en float32, recorte de ventanas por índice y
+envolvente mín/máx por columna de píxel para graficar.
+"""
+import re
+from datetime import time as dt_time
+from fractions import Fraction
+from functools import lru_cache
+
+import numpy as np
+try:
+    from numba import njit, types
+except ImportError:  # numba es opcional: se usa la reducción de NumPy
+    njit = None
+
+# Hora de inicio 'HH:MM:SS' con milisegundos opcionales ',mmm'; como strptime('%H:%M:%S'), cada campo admite 1 o 2 dígitos
+HORA_RE = re.compile(r'(\d{1,2}):(\d{1,2}):(\d{1,2})(?:,(\d{1,3}))?')
+
+# Convierte 'HH:MM:SS[,mmm]' en datetime.time con una regex precompilada
+def parse_hora(time_str):
+    m = HORA_RE.fullmatch(time_str)
+    if m is None:
+        raise ValueError(f"Formato de hora inválido: {time_str!r}")
+    return dt_time(int(m.group(1)), int(m.group(2)), int(m.group(3)), int(m.group(4) or 0) * 1000)
+
+# Formatea un datetime como 'HH:MM:SS,mmm' con aritmética entera (sin strftime ni locale)
+def formatear_hora(dt):
+    return "%02d:%02d:%02d,%03d" % (dt.hour, dt.minute, dt.second, dt.microsecond // 1000)
+
+# Resamplea cada traza a 100 Hz (in situ); el resultado es siempre float32, nunca el dtype entero de origen
+def resamplear_100hz(stream):
+    from scipy.signal import resample_poly  # scipy.signal se importa en el primer uso (hilo de E/S)
+    for tr in stream:
+        sr = tr.stats.sampling_rate
+        if sr == 100.0:
+            continue
+        razon = Fraction(100.0 / sr).limit_denominator(1000)
+        if abs(float(razon) * sr - 100.0) > 1e-6:
+            # Sin razón exacta up/down (p. ej. 99.99 Hz) no se reetiqueta: resampleo FFT de obspy
+            tr.resample(100.0)
+        else:
+            tr.data = resample_poly(tr.data.astype(np.float32, copy=False), razon.numerator, razon.denominator)
+            tr.stats.sampling_rate = 100.0
+        tr.data = tr.data.astype(np.float32, copy=False)
+    return stream
+
+# Eje de tiempos float32 (s), compartido por trazas y previsualizaciones de igual longitud
+@lru_cache(maxsize=8)
+def eje_tiempos(npts, delta):
+    times = np.arange(npts, dtype=np.float32) * np.float32(delta)
+    times.flags.writeable = False
+    return times
+
+# Pares (tiempos, datos float32) de [t0, t1] recortados como vistas por índice de muestra, sin Stream.trim
+def extraer_segmento(stream, t0, t1):
+    trazas = []
+    for tr in stream:
+        sr = tr.stats.sampling_rate
+        i0 = max(0, int(round((t0 - tr.stats.starttime) * sr)))
+        i1 = min(tr.stats.npts, int(round((t1 - tr.stats.starttime) * sr)) + 1)
+        if i1 > i0:
+            trazas.append((eje_tiempos(i1 - i0, tr.stats.delta), tr.data[i0:i1]))
+    return trazas
+
+# Convierte in situ las muestras decodificadas (miniSEED suele dar int32) a float32
+def a_float32(stream):
+    # Resampleo, cachés y Agg trabajan con la mitad de bytes que en float64 y los recortes quedan como vistas
+    for tr in stream:
+        tr.data = tr.data.astype(np.float32, copy=False)
+    return stream
+
+# Muestras por bloque por debajo de las cuales el kernel de numba gana a las reducciones de NumPy: en bloques
+# cortos domina el costo por fila de min/max de NumPy; en largos, su SIMD (medido con 800 y 1600 px)
+BLOQUE_NUMBA_MAX = 192
+
+# Mínimo y máximo de cada bloque de x con reducciones de NumPy
+def minmax_numpy(x, n_buckets, out_min, out_max):
+    bloques = x[:n_buckets * (x.size // n_buckets)].reshape(n_buckets, -1)
+    bloques.min(axis=1, out=out_min); bloques.max(axis=1, out=out_max)
+
+if njit is not None:
+    # Mínimo y máximo de cada bloque de x en una sola pasada; selección sin bifurcación para que LLVM vectorice
+    @njit(cache=True, fastmath=True)
+    def minmax_numba(x, n_buckets, out_min, out_max):
+        b = x.size // n_buckets
+        for i in range(n_buckets):
+            lo = x[i * b]; hi = lo
+            for j in range(i * b + 1, (i + 1) * b):
+                v = x[j]
+                lo = v if v < lo else lo
+                hi = v if v > hi else hi
+            out_min[i] = lo; out_max[i] = hi
+
+    # Compila (sin ejecutar) las firmas que usa envolvente: entrada float32 escribible (ventana decodificada)
+    # y de solo lectura (caché .npy mapeada), salidas con paso; apta para un hilo en segundo plano
+    def precompilar_minmax():
+        salida = types.Array(types.float32, 1, 'A')
+        for solo_lectura in (False, True):
+            minmax_numba.compile((types.Array(types.float32, 1, 'C', readonly=solo_lectura), types.int64, salida, salida))
+else:
+    minmax_numba = precompilar_minmax = None
+
+# Mín/máx por bloque con la implementación más rápida para el tamaño de bloque
+def minmax_decimate(x, n_buckets, out_min, out_max):
+    if minmax_numba is not None and x.size // n_buckets < BLOQUE_NUMBA_MAX:
+        minmax_numba(x, n_buckets, out_min, out_max)
+    else:
+        minmax_numpy(x, n_buckets, out_min, out_max)
+
+# Segmento (N, 2) para LineCollection; pares mín/máx por columna de píxel si excede 4 puntos por píxel
+def envolvente(times, data, n_px):
+    n_px = int(n_px)
+    if n_px <= 0 or len(data) <= 4 * n_px:
+        return np.column_stack((times, data))
+    b = len(data) // n_px; n = len(data) // b; m = n * b
+    # Se escribe directamente en el arreglo final (sin xs/ys intermedios ni concatenaciones)
+    seg = np.empty((2 * n + len(data) - m, 2), dtype=np.result_type(times, data))
+    minmax_decimate(data[:m], n, seg[0:2 * n:2, 1], seg[1:2 * n:2, 1])
+    seg[0:2 * n:2, 0] = times[:m:b]; seg[1:2 * n:2, 0] = times[:m:b]
+    # Cola que no completa un bloque (menos de un píxel): se agrega sin reducir
+    seg[2 * n:, 0] = times[m:]; seg[2 * n:, 1] = data[m:]
+    return seg
@@ -1,7 +1,8 @@
 #!/home/rsa/git/RSA-InferenciaGPD/venv/bin/python
 """
 Script para visualizar una ventana de tiempo específica de un archivo miniSEED,
-utilizando las rutas definidas en el archivo .env del proyecto.
+utilizando las rutas definidas en el archivo .env del proyecto. La figura se
+genera sin interfaz gráfica (backend Agg) y se guarda como PNG en resultados/figuras.
 
 Uso:
     python visualizar_evento.py <archivo_mseed> <inicio_iso8601> <duracion_segundos>
@@ -12,21 +13,6 @@ Ejemplo:
 import os
 import sys
 
-# Validar si tkinter está disponible antes de importar matplotlib y obspy
-def verificar_tkinter():
-    try:
-        import tkinter
-    except ImportError:
-        print(
-            "ERROR: No se encontró el módulo 'tkinter'.\n"
-            "Por favor, instale 'python3-tk' usando:\n"
-            "  sudo apt install python3-tk\n"
-            "y vuelva a ejecutar este script."
-        )
-        sys.exit(1)
-
-verificar_tkinter()
-
 from dotenv import load_dotenv, find_dotenv
 from obspy import read, UTCDateTime
 
@@ -59,7 +45,7 @@ if not os.path.isfile(ruta_mseed):
 
 # 4. Leer archivo y recortar al intervalo deseado
 try:
-    stream = read(ruta_mseed)
+    stream = read(ruta_mseed, format='MSEED')
     inicio = UTCDateTime(timestamp_inicio)
     fin = inicio + duracion
     stream_recortado = stream.slice(starttime=inicio, endtime=fin)
@@ -73,8 +59,22 @@ if len(stream_recortado) == 0:
     print("No se encontraron datos en el intervalo especificado.")
     sys.exit(1)
 
-# Importar matplotlib después de la verificación de tkinter
-import matplotlib
-matplotlib.use('TkAgg')
+# 6. Render no interactivo: Figure + lienzo Agg, sin pyplot ni Tk
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+fig = Figure(figsize=(8, 2.5 * len(stream_recortado)))
+FigureCanvasAgg(fig)
+axes = fig.subplots(len(stream_recortado), 1, sharex=True, squeeze=False)[:, 0]
+for ax, tr in zip(axes, stream_recortado):
+    ax.plot(tr.times(), tr.data, linewidth=0.8, label=tr.id)
+    ax.legend(loc='upper right', fontsize='small')
+axes[-1].set_xlabel(f"Tiempo (s) desde {inicio}")
+fig.tight_layout()
 
-stream_recortado.plot()
+dir_figuras = os.path.join(PROJECT_LOCAL_ROOT, "resultados", "figuras")
+os.makedirs(dir_figuras, exist_ok=True)
+nombre_png = f"{os.path.splitext(os.path.basename(nombre_archivo))[0]}_{inicio.strftime('%Y%m%dT%H%M%S')}.png"
+ruta_png = os.path.join(dir_figuras, nombre_png)
+fig.savefig(ruta_png, dpi=100)
+print(f"Figura guardada en: {ruta_png}")
@@ -0,0 +1,60 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+obspy = pytest.importorskip("obspy")
+from obspy import Stream, Trace, UTCDateTime
+
+from cache_npy import guardar_cache_npy, leer_cache_npy, rutas_cache
+
+T0 = UTCDateTime(2024, 5, 1, 12)
+
+
+# Canal ENT de 60 s a 200 Hz (la caché guarda la versión a 100 Hz)
+@pytest.fixture
+def archivo(tmp_path):
+    path = str(tmp_path / "mseed" / "evento.mseed"); os.makedirs(os.path.dirname(path))
+    Stream([Trace(np.arange(12000, dtype=np.int32) % 500,
+                  header={'station': 'RSA', 'channel': 'ENT', 'sampling_rate': 200.0, 'starttime': T0})]
+           ).write(path, format='MSEED', reclen=512)
+    return path
+
+
+def test_ida_y_vuelta(tmp_path, archivo):
+    dir_cache = str(tmp_path / "cache_npy")
+    guardar_cache_npy(dir_cache, archivo, "ENT")
+    tr = leer_cache_npy(dir_cache, archivo, os.path.getmtime(archivo), "ENT")
+    assert isinstance(tr.data, np.memmap) and not tr.data.flags.writeable
+    assert tr.data.dtype == np.float32 and tr.stats.npts == 6000
+    assert tr.stats.sampling_rate == 100.0 and tr.stats.starttime == T0 and tr.stats.channel == "ENT"
+    # Solo quedan el .npy y el .json, sin temporales
+    assert sorted(os.listdir(dir_cache)) == sorted(os.path.basename(r) for r in rutas_cache(dir_cache, archivo, "ENT"))
+
+
+def test_cache_vencida_por_mtime(tmp_path, archivo):
+    dir_cache = str(tmp_path / "cache_npy")
+    guardar_cache_npy(dir_cache, archivo, "ENT")
+    mtime = os.path.getmtime(archivo)
+    os.utime(archivo, (mtime + 10, mtime + 10))
+    assert leer_cache_npy(dir_cache, archivo, mtime + 10, "ENT") is None
+    # Al regenerar se reemplaza en el mismo lugar
+    guardar_cache_npy(dir_cache, archivo, "ENT")
+    assert leer_cache_npy(dir_cache, archivo, mtime + 10, "ENT") is not None
+    assert len(os.listdir(dir_cache)) == 2
+
+
+def test_cache_de_otro_archivo_con_igual_nombre(tmp_path, archivo):
+    dir_cache = str(tmp_path / "cache_npy")
+    guardar_cache_npy(dir_cache, archivo, "ENT")
+    otro = str(tmp_path / "otro" / "evento.mseed"); os.makedirs(os.path.dirname(otro))
+    shutil.copy2(archivo, otro)
+    assert leer_cache_npy(dir_cache, otro, os.path.getmtime(otro), "ENT") is None
+
+
+def test_sin_cache_o_canal_distinto(tmp_path, archivo):
+    dir_cache = str(tmp_path / "cache_npy")
+    assert leer_cache_npy(dir_cache, archivo, os.path.getmtime(archivo), "ENT") is None
+    guardar_cache_npy(dir_cache, archivo, "ENR")  # canal ausente: no se escribe nada
+    assert not os.path.exists(dir_cache)
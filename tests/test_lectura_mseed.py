@@ -0,0 +1,114 @@
+import io
+import os
+
+import numpy as np
+import pytest
+
+obspy = pytest.importorskip("obspy")
+from obspy import Stream, Trace, UTCDateTime
+
+from lectura_mseed import indice_registros, leer_ventana, fuente_canal, limites_por_canal
+
+T0 = UTCDateTime(2024, 5, 1, 12)
+CANALES = ("ENT", "ENR", "ENV")
+RECLEN = 512
+
+
+# Tres canales de 10 min a 100 Hz con muestras distintas por canal
+def trazas():
+    return [Trace(np.arange(60000, dtype=np.int32) * (c + 1),
+                  header={'network': 'XX', 'station': 'RSA', 'channel': ch, 'sampling_rate': 100.0, 'starttime': T0})
+            for c, ch in enumerate(CANALES)]
+
+
+# Archivo sintético: un bloque contiguo por canal (como Stream.write) o registros intercalados
+def escribir(path, multiplexado, orden):
+    if not multiplexado:
+        Stream(trazas()).write(str(path), format='MSEED', reclen=RECLEN, byteorder=orden)
+        return
+    bloques = []
+    for tr in trazas():
+        buf = io.BytesIO(); Stream([tr]).write(buf, format='MSEED', reclen=RECLEN, byteorder=orden)
+        datos = buf.getvalue(); bloques.append([datos[k:k + RECLEN] for k in range(0, len(datos), RECLEN)])
+    n = max(len(b) for b in bloques)
+    path.write_bytes(b''.join(b[k] for k in range(n) for b in bloques if k < len(b)))
+
+
+@pytest.fixture(params=[(False, '>'), (False, '<'), (True, '>'), (True, '<')],
+                ids=['contiguo-be', 'contiguo-le', 'intercalado-be', 'intercalado-le'])
+def archivo(request, tmp_path):
+    path = tmp_path / "sintetico.mseed"
+    escribir(path, *request.param)
+    return str(path)
+
+
+# Cuenta las lecturas de archivo completo (read sobre la ruta en vez de sobre los registros elegidos)
+@pytest.fixture
+def lecturas_completas(monkeypatch):
+    llamadas = []
+    read_original = obspy.read
+    def read(fuente, *args, **kwargs):
+        if not isinstance(fuente, io.BytesIO):
+            llamadas.append(fuente)
+        return read_original(fuente, *args, **kwargs)
+    monkeypatch.setattr(obspy, "read", read)
+    return llamadas
+
+
+def test_indice_por_canal(archivo):
+    reclen, indice = indice_registros(archivo, os.path.getmtime(archivo))
+    assert reclen == RECLEN
+    assert sorted(indice) == sorted(CANALES)
+    assert sum(len(k) for k, _, _ in indice.values()) == os.path.getsize(archivo) // RECLEN
+    for k, ini, fin in indice.values():
+        assert np.all(np.diff(ini) >= 0) and np.all(np.diff(fin) >= 0)
+        assert ini[0] == pytest.approx(T0.timestamp) and fin[-1] == pytest.approx(T0.timestamp + 600)
+
+
+@pytest.mark.parametrize("canal", CANALES)
+@pytest.mark.parametrize("a, b", [(-1.0, 5.0), (0.0, 0.5), (123.4, 151.2), (299.99, 300.01),
+                                  (595.0, 601.0), (-10.0, 610.0)],
+                         ids=['antes-inicio', 'inicio', 'medio', 'limite-registro', 'pasado-fin', 'todo'])
+def test_ventana_igual_a_read(archivo, lecturas_completas, canal, a, b):
+    t0, t1 = T0 + a, T0 + b
+    indice = indice_registros(archivo, os.path.getmtime(archivo))
+    st = leer_ventana(archivo, indice, t0, t1, canal)
+    assert lecturas_completas == []  # ni los bordes del archivo recurren a read() completo
+    ref = obspy.read(archivo, format='MSEED', starttime=t0, endtime=t1, sourcename=fuente_canal(canal))
+    assert [tr.id for tr in st] == [tr.id for tr in ref]
+    assert st[0].stats.starttime == ref[0].stats.starttime
+    np.testing.assert_array_equal(st[0].data, ref[0].data)
+
+
+def test_ventana_fuera_del_archivo(archivo, lecturas_completas):
+    indice = indice_registros(archivo, os.path.getmtime(archivo))
+    assert len(leer_ventana(archivo, indice, T0 + 700, T0 + 710, "ENT")) == 0
+    assert lecturas_completas == []
+
+
+def test_canal_ausente_recurre_a_read(archivo, lecturas_completas):
+    indice = indice_registros(archivo, os.path.getmtime(archivo))
+    assert len(leer_ventana(archivo, indice, T0, T0 + 5, "HHZ")) == 0
+    assert lecturas_completas == [archivo]
+
+
+def test_archivo_no_mseed(tmp_path):
+    path = tmp_path / "ruido.mseed"
+    path.write_bytes(bytes(range(256)) * 8)
+    assert indice_registros(str(path), os.path.getmtime(path)) is None
+
+
+# Canal con hueco entre 300 s y 400 s: la lectura de cabeceras devuelve dos trazas para ENT
+def test_limites_por_canal_con_hueco(tmp_path):
+    path = str(tmp_path / "hueco.mseed")
+    st = Stream(trazas())
+    ent = st.select(channel="ENT")[0]
+    Stream([ent.slice(T0, T0 + 299.99), ent.slice(T0 + 400, None)] + st.traces[1:]).write(path, format='MSEED', reclen=RECLEN)
+    cab = obspy.read(path, format='MSEED', headonly=True)
+    limites = limites_por_canal(cab)
+    assert len(cab.select(channel="ENT")) == 2
+    assert limites["ENT"] == (T0, T0 + 599.99)
+    assert set(limites) == set(CANALES)
+    indice = indice_registros(path, os.path.getmtime(path))
+    assert len(leer_ventana(path, indice, T0 + 480, T0 + 490, "ENT")[0].data) == 1001
+    assert len(leer_ventana(path, indice, T0 + 320, T0 + 330, "ENT")) == 0
@@ -0,0 +1,120 @@
+from datetime import datetime, time
+
+import numpy as np
+import pytest
+
+import previsualizacion
+from previsualizacion import parse_hora, formatear_hora, envolvente, resamplear_100hz, extraer_segmento, a_float32
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("12:03:04", time(12, 3, 4)),
+    ("7:00:00", time(7, 0, 0)),
+    ("12:3:04", time(12, 3, 4)),
+    ("12:03:4,25", time(12, 3, 4, 25000)),
+    ("12:03:04,5", time(12, 3, 4, 5000)),
+    ("23:59:59,999", time(23, 59, 59, 999000)),
+])
+def test_parse_hora(texto, esperado):
+    assert parse_hora(texto) == esperado
+
+
+@pytest.mark.parametrize("texto", ["", "12:03", "12:03:04,", "12:03:04,1234", "12:003:04", "12:60:00", "a2:03:04", "24:00:00"])
+def test_parse_hora_invalida(texto):
+    with pytest.raises(ValueError):
+        parse_hora(texto)
+
+
+def test_formatear_hora():
+    assert formatear_hora(datetime(2024, 5, 1, 7, 8, 9, 5999)) == "07:08:09,005"
+    assert formatear_hora(datetime(2024, 5, 1, 23, 59, 59, 999999)) == "23:59:59,999"
+
+
+def test_envolvente_sin_reducir():
+    t = np.arange(40, dtype=np.float32); d = np.sin(t)
+    np.testing.assert_array_equal(envolvente(t, d, 10), np.column_stack((t, d)))
+
+
+# 10007 muestras en 100 px: bloques de 100 (kernel de numba si está); 100003: bloques de 1000 (NumPy)
+@pytest.mark.parametrize("npts", [10007, 100003])
+@pytest.mark.parametrize("solo_lectura", [False, True])
+def test_envolvente_min_max(solo_lectura, npts):
+    rng = np.random.default_rng(0)
+    t = np.arange(npts, dtype=np.float32) * np.float32(0.01)
+    d = rng.standard_normal(npts).astype(np.float32)
+    d.flags.writeable = not solo_lectura  # los datos de la caché .npy llegan mapeados en solo lectura
+    seg = envolvente(t, d, 100.0)
+    b = npts // 100; n = npts // b; m = n * b
+    bloques = d[:m].reshape(n, b)
+    np.testing.assert_array_equal(seg[0:2 * n:2, 1], bloques.min(axis=1))
+    np.testing.assert_array_equal(seg[1:2 * n:2, 1], bloques.max(axis=1))
+    np.testing.assert_array_equal(seg[0:2 * n:2, 0], t[:m:b])
+    # La cola que no completa un bloque se conserva sin reducir
+    np.testing.assert_array_equal(seg[2 * n:], np.column_stack((t[m:], d[m:])))
+
+
+# Tras precompilar, ni la ventana decodificada ni la caché mapeada en solo lectura compilan otra firma
+@pytest.mark.skipif(previsualizacion.minmax_numba is None, reason="numba no instalado")
+def test_precompilar_cubre_las_firmas_de_envolvente():
+    previsualizacion.precompilar_minmax()
+    firmas = len(previsualizacion.minmax_numba.signatures)
+    t = np.arange(50000, dtype=np.float32)
+    d = np.ones(50000, dtype=np.float32)
+    envolvente(t, d, 800)
+    d.flags.writeable = False
+    envolvente(t, d, 800)
+    assert len(previsualizacion.minmax_numba.signatures) == firmas == 2
+
+
+# 10 s de muestras int32 a la tasa dada, como las entrega la decodificación miniSEED
+def traza(sr, npts=None):
+    obspy = pytest.importorskip("obspy")
+    npts = npts or int(round(10 * sr))
+    return obspy.Trace(np.arange(npts, dtype=np.int32) % 1000,
+                       header={'sampling_rate': sr, 'starttime': obspy.UTCDateTime(2024, 5, 1, 12)})
+
+
+# Razones exactas (polifásico) y 99.99 Hz (sin razón up/down exacta: resampleo FFT, no reetiquetado 1/1)
+@pytest.mark.parametrize("sr", [200.0, 250.0, 40.0, 99.99])
+def test_resamplear_100hz(sr):
+    obspy = pytest.importorskip("obspy")
+    tr = traza(sr); npts = tr.stats.npts
+    st = resamplear_100hz(obspy.Stream([tr]))
+    assert st[0].stats.sampling_rate == 100.0
+    assert st[0].data.dtype == np.float32
+    assert st[0].stats.npts == pytest.approx(npts * 100.0 / sr, abs=1)
+    # Sin truncamiento a enteros: el filtro deja valores fraccionarios
+    assert np.any(st[0].data != np.round(st[0].data))
+
+
+def test_resamplear_100hz_sin_cambios():
+    obspy = pytest.importorskip("obspy")
+    tr = traza(100.0); datos = tr.data
+    resamplear_100hz(obspy.Stream([tr]))
+    assert tr.data is datos
+
+
+def test_a_float32():
+    obspy = pytest.importorskip("obspy")
+    st = a_float32(obspy.Stream([traza(100.0)]))
+    assert st[0].data.dtype == np.float32
+
+
+# Ventanas que exceden la traza por izquierda, derecha o ambos lados se recortan a [0, npts)
+@pytest.mark.parametrize("a, b, i0, i1", [(2.0, 3.0, 200, 301), (-5.0, 1.0, 0, 101), (9.0, 15.0, 900, 1000),
+                                          (-1.0, 11.0, 0, 1000)],
+                         ids=['interior', 'antes-inicio', 'pasado-fin', 'ambos'])
+def test_extraer_segmento(a, b, i0, i1):
+    obspy = pytest.importorskip("obspy")
+    tr = a_float32(obspy.Stream([traza(100.0)]))[0]; t = tr.stats.starttime
+    (tiempos, datos), = extraer_segmento([tr], t + a, t + b)
+    assert len(tiempos) == len(datos) == i1 - i0
+    np.testing.assert_array_equal(datos, tr.data[i0:i1])
+    assert np.shares_memory(datos, tr.data)  # vista, sin copia
+    assert tiempos[1] == pytest.approx(0.01) and not tiempos.flags.writeable
+
+
+def test_extraer_segmento_fuera_de_traza():
+    tr = traza(100.0); t = tr.stats.starttime
+    assert extraer_segmento([tr], t + 20, t + 30) == []
+    assert extraer_segmento([tr], t - 30, t - 20) == []